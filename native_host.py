@@ -1,34 +1,95 @@
 import sys
 import os
+import re
 import json
+import mmap
+import queue
+import hashlib
+import atexit
+import shutil
 import struct
 import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
-try:
-    import zstandard as zstd
-    ZSTD_AVAILABLE = True
-except ImportError:
-    ZSTD_AVAILABLE = False
-    logging.warning("zstandard module not available. Install with: pip install zstandard")
+# Pre-compiled message length header (native byte order uint32) so the
+# format string isn't re-parsed on every message
+_MESSAGE_HEADER = struct.Struct('@I')
 
 try:
-    import pyperclip
-    CLIPBOARD_AVAILABLE = True
+    # Optional: C-implemented JSON encoder, noticeably faster on large
+    # responses. Falls back to the stdlib json module when not installed.
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    CLIPBOARD_AVAILABLE = False
-    logging.warning("pyperclip module not available. Install with: pip install pyperclip")
-
-try:
-    from demoparser2 import DemoParser
-    DEMOPARSER_AVAILABLE = True
-except ImportError:
-    DEMOPARSER_AVAILABLE = False
-    logging.warning("demoparser2 module not available. Install with: pip install demoparser2")
+    ORJSON_AVAILABLE = False
 
 from datetime import datetime
+from functools import lru_cache
 from path_finder import PathConfigManager
 
+# Heavy optional dependencies (zstandard, pyperclip, demoparser2) are
+# imported lazily inside the functions that use them. demoparser2 alone
+# drags in pandas/numpy, which would otherwise be paid on every launch —
+# even for a plain "ping". None = not tried yet, False = import failed.
+_zstd = None
+_pyperclip = None
+_demoparser = None
+
+def _load_zstd():
+    """Import zstandard on first use. Returns the module or None."""
+    global _zstd
+    if _zstd is None:
+        try:
+            import zstandard
+            _zstd = zstandard
+        except ImportError:
+            _zstd = False
+            logging.warning("zstandard module not available. Install with: pip install zstandard")
+    return _zstd or None
+
+def _load_pyperclip():
+    """Import pyperclip on first use. Returns the module or None."""
+    global _pyperclip
+    if _pyperclip is None:
+        try:
+            import pyperclip
+            _pyperclip = pyperclip
+        except ImportError:
+            _pyperclip = False
+            logging.warning("pyperclip module not available. Install with: pip install pyperclip")
+    return _pyperclip or None
+
+def _load_demoparser():
+    """Import demoparser2 on first use. Returns the DemoParser class or None."""
+    global _demoparser
+    if _demoparser is None:
+        try:
+            from demoparser2 import DemoParser
+            _demoparser = DemoParser
+        except ImportError:
+            _demoparser = False
+            logging.warning("demoparser2 module not available. Install with: pip install demoparser2")
+    return _demoparser or None
+
+@lru_cache(maxsize=1)
+def _config_manager() -> PathConfigManager:
+    """
+    Shared PathConfigManager instance.
+    Cached so repeated actions don't re-probe the registry and filesystem.
+    """
+    return PathConfigManager()
+
+@lru_cache(maxsize=1)
+def _csgo_folder():
+    """Resolved CS2 csgo folder, cached for the lifetime of the process."""
+    return _config_manager().get_cs2_csgo_path()
+
+def _reset_path_cache():
+    """Drop cached paths after the user reconfigures them."""
+    _csgo_folder.cache_clear()
+    _config_manager.cache_clear()
+
 def get_executable_dir():
     """
     Get the directory where the executable/script is located.
@@ -58,13 +119,27 @@ def get_log_file_path():
 
 # Set up logging to a user-writable location.
 # This is crucial for debugging because stdout is reserved for Chrome communication.
-logging.basicConfig(
-    filename=str(get_log_file_path()),
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s',
-    filemode='a',  # Append to the log file
-    encoding='utf-8'
-)
+# Records go through a queue so file I/O happens on a background thread
+# instead of on the message-handling path.
+def _setup_logging():
+    log_queue = queue.Queue(-1)
+    file_handler = RotatingFileHandler(
+        str(get_log_file_path()),
+        maxBytes=5_000_000,
+        backupCount=3,
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)  # Drain the queue before exit
+
+_setup_logging()
 
 def get_message():
     """
@@ -75,20 +150,28 @@ def get_message():
     if not raw_length:
         sys.exit(0)
 
-    message_length = struct.unpack('@I', raw_length)[0]
-    message = sys.stdin.buffer.read(message_length).decode('utf-8')
-    return json.loads(message)
+    message_length = _MESSAGE_HEADER.unpack(raw_length)[0]
+
+    # Both json and orjson accept bytes and do the UTF-8 decode in C in a
+    # single pass, so skip the intermediate str
+    raw_message = sys.stdin.buffer.read(message_length)
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw_message)
+    return json.loads(raw_message)
 
 def send_message(message_content):
     """
     Sends a message to stdout, adhering to the Native Messaging protocol.
     The message is a JSON-encoded string, prefixed with its length in bytes.
     """
-    encoded_content = json.dumps(message_content).encode('utf-8')
-    encoded_length = struct.pack('@I', len(encoded_content))
+    if ORJSON_AVAILABLE:
+        encoded_content = orjson.dumps(message_content)
+    else:
+        encoded_content = json.dumps(message_content).encode('utf-8')
+    encoded_length = _MESSAGE_HEADER.pack(len(encoded_content))
 
-    sys.stdout.buffer.write(encoded_length)
-    sys.stdout.buffer.write(encoded_content)
+    # Single write so the length header and payload go out in one syscall
+    sys.stdout.buffer.write(encoded_length + encoded_content)
     sys.stdout.buffer.flush()
 
 def copy_playdemo_to_clipboard(demo_filename: str) -> dict:
@@ -104,7 +187,8 @@ def copy_playdemo_to_clipboard(demo_filename: str) -> dict:
     playdemo_command = f"playdemo {demo_filename}"
 
     try:
-        if CLIPBOARD_AVAILABLE:
+        pyperclip = _load_pyperclip()
+        if pyperclip is not None:
             pyperclip.copy(playdemo_command)
             return {
                 "method": "clipboard",
@@ -136,8 +220,7 @@ def delete_demo_file(demo_filename: str) -> dict:
         dict: Status of the deletion
     """
     try:
-        config_manager = PathConfigManager()
-        csgo_folder = config_manager.get_cs2_csgo_path()
+        csgo_folder = _csgo_folder()
 
         if not csgo_folder:
             logging.error("CS2 csgo folder not found")
@@ -171,6 +254,65 @@ def delete_demo_file(demo_filename: str) -> dict:
             "message": f"Failed to delete demo: {str(e)}"
         }
 
+def _fast_read_map_name(demo_path: Path):
+    """
+    Read the map name directly from the demo file header.
+
+    Only the first 2 KB of the file are read, which avoids handing the
+    whole multi-hundred-MB demo to DemoParser just to get one string.
+
+    Args:
+        demo_path: Path to the .dem file
+
+    Returns:
+        Map name string, or None if the header format is not recognized
+    """
+    try:
+        with open(demo_path, 'rb') as f:
+            header = f.read(2048)
+
+        if header.startswith(b'HL2DEMO\x00'):
+            # Legacy CSGO format: fixed-size header struct, map name is a
+            # null-terminated 260-byte field after the server/client names.
+            raw = header[536:796]
+            map_name = raw.split(b'\x00', 1)[0].decode('utf-8', errors='ignore')
+            return map_name or None
+
+        if header.startswith(b'PBDEMS2\x00'):
+            # CS2 format: the header is a protobuf blob, but the map name is
+            # embedded as a plain string with a well-known prefix.
+            match = re.search(rb'\b((?:de|cs|ar)_[a-z0-9_]+)', header)
+            if match:
+                return match.group(1).decode('utf-8')
+
+    except Exception as e:
+        logging.warning(f"Fast header read failed for {demo_path.name}: {e}")
+
+    return None
+
+@lru_cache(maxsize=4)
+def _open_demo_cached(path_str: str, mtime: float):
+    """Cache layer for _open_demo; keyed on path and mtime."""
+    DemoParser = _load_demoparser()
+    if DemoParser is None:
+        return None
+    return DemoParser(path_str)
+
+def _open_demo(demo_path: Path):
+    """
+    Get a DemoParser for a demo file, reusing a cached instance when the
+    same unmodified file is opened again. Constructing a DemoParser
+    re-maps and re-indexes the demo, so repeat opens skip that setup.
+
+    Args:
+        demo_path: Path to the .dem file
+
+    Returns:
+        DemoParser instance, or None when demoparser2 is unavailable
+    """
+    st = os.stat(demo_path)
+    return _open_demo_cached(str(demo_path), st.st_mtime)
+
 def parse_demo_metadata(demo_path: Path) -> dict:
     """
     Parse demo file and extract metadata: map name and date.
@@ -179,21 +321,24 @@ def parse_demo_metadata(demo_path: Path) -> dict:
         demo_path: Path to the .dem file
 
     Returns:
-        dict with 'map', 'date', and 'filename' keys
+        dict with 'map', 'date', and 'base_filename' keys
         Returns None if parsing fails
     """
-    if not DEMOPARSER_AVAILABLE:
-        logging.warning("demoparser2 not available, skipping demo parsing")
-        return None
-
     try:
         logging.info(f"Parsing demo metadata: {demo_path.name}")
 
-        parser = DemoParser(str(demo_path))
+        # Fast path: read the map name straight from the header bytes
+        map_name = _fast_read_map_name(demo_path)
 
-        # Parse header for map name
-        header = parser.parse_header()
-        map_name = header.get('map_name', 'unknown')
+        if map_name is None:
+            # Fall back to the full parser for unrecognized headers
+            parser = _open_demo(demo_path)
+            if parser is None:
+                logging.warning("demoparser2 not available, skipping demo parsing")
+                return None
+
+            header = parser.parse_header()
+            map_name = header.get('map_name', 'unknown')
 
         # Clean map name (remove de_ or cs_ prefix)
         map_name = map_name.replace('de_', '').replace('cs_', '')
@@ -203,28 +348,83 @@ def parse_demo_metadata(demo_path: Path) -> dict:
         file_date = datetime.fromtimestamp(demo_path.stat().st_mtime)
         date_str = file_date.strftime("%d%b%Y").lower()  # e.g., "19oct2025"
 
-        # Create base filename (map + date)
+        # Create base filename (map + date). Collision handling happens
+        # atomically at rename time in process_demo_file.
         base_filename = f"{map_name}_{date_str}"
-        new_filename = f"{base_filename}.dem"
-
-        # Check if file already exists, add counter if needed
-        counter = 2
-        while (demo_path.parent / new_filename).exists() and str(demo_path.parent / new_filename) != str(demo_path):
-            new_filename = f"{base_filename}_{counter}.dem"
-            counter += 1
 
-        logging.info(f"Parsed demo metadata - New filename: {new_filename}")
+        logging.info(f"Parsed demo metadata - Base filename: {base_filename}")
 
         return {
             'map': map_name,
             'date': date_str,
-            'filename': new_filename
+            'base_filename': base_filename
         }
 
     except Exception as e:
         logging.error(f"Failed to parse demo metadata: {e}", exc_info=True)
         return None
 
+def _claim_demo_filename(csgo_folder: Path, base_filename: str, current_name: str) -> str:
+    """
+    Atomically claim a free filename for the renamed demo.
+
+    Each candidate is created with O_CREAT|O_EXCL, so two host processes
+    can never claim the same name; on collision the counter is bumped and
+    the next candidate is tried. The caller is expected to os.replace the
+    demo over the claimed placeholder.
+
+    Args:
+        csgo_folder: Folder the demo lives in
+        base_filename: The "{map}_{date}" stem
+        current_name: Name the demo currently has (a self-match is kept)
+
+    Returns:
+        The claimed filename
+    """
+    candidate = f"{base_filename}.dem"
+    counter = 2
+
+    while True:
+        if candidate == current_name:
+            # Already named correctly, nothing to claim
+            return candidate
+
+        try:
+            fd = os.open(str(csgo_folder / candidate), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            return candidate
+        except FileExistsError:
+            candidate = f"{base_filename}_{counter}.dem"
+            counter += 1
+
+# Sidecar index mapping compressed-demo fingerprints to the filename they
+# were decompressed to, so re-downloading the same demo skips decompression
+DEMO_INDEX_FILENAME = ".processed_demos.json"
+
+def _compressed_demo_digest(file_path: Path) -> str:
+    """Fingerprint a compressed demo by hashing its first 4 KB."""
+    with open(file_path, 'rb') as f:
+        return hashlib.blake2b(f.read(4096)).hexdigest()
+
+def _load_demo_index(csgo_folder: Path) -> dict:
+    """Load the processed-demo index from the csgo folder."""
+    index_path = csgo_folder / DEMO_INDEX_FILENAME
+    if index_path.exists():
+        try:
+            with open(index_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"Could not read demo index: {e}")
+    return {}
+
+def _save_demo_index(csgo_folder: Path, index: dict):
+    """Save the processed-demo index to the csgo folder."""
+    try:
+        with open(csgo_folder / DEMO_INDEX_FILENAME, 'w') as f:
+            json.dump(index, f)
+    except Exception as e:
+        logging.warning(f"Could not write demo index: {e}")
+
 def process_demo_file(file_path_str: str) -> dict:
     """
     Process a FACEIT demo file: decompress, move to CS2 csgo folder, and launch.
@@ -237,7 +437,8 @@ def process_demo_file(file_path_str: str) -> dict:
     """
     try:
         # Check if zstandard is available
-        if not ZSTD_AVAILABLE:
+        zstd = _load_zstd()
+        if zstd is None:
             return {
                 "status": "error",
                 "message": "Decompression library not installed. Please run: pip install zstandard"
@@ -264,8 +465,7 @@ def process_demo_file(file_path_str: str) -> dict:
         logging.info(f"Processing demo file: {file_path}")
 
         # Get CS2 csgo folder
-        config_manager = PathConfigManager()
-        csgo_folder = config_manager.get_cs2_csgo_path()
+        csgo_folder = _csgo_folder()
 
         if not csgo_folder:
             logging.error("CS2 csgo folder not found")
@@ -277,27 +477,85 @@ def process_demo_file(file_path_str: str) -> dict:
 
         logging.info(f"Using CS2 csgo folder: {csgo_folder}")
 
+        # Short-circuit if this exact compressed demo was processed before
+        # and its decompressed output is still in place
+        try:
+            digest = _compressed_demo_digest(file_path)
+        except OSError as e:
+            logging.warning(f"Could not fingerprint compressed demo: {e}")
+            digest = None
+
+        demo_index = _load_demo_index(csgo_folder) if digest else {}
+        cached_name = demo_index.get(digest)
+
+        if cached_name and (csgo_folder / cached_name).exists():
+            logging.info(f"Demo already processed, skipping decompression: {cached_name}")
+
+            try:
+                file_path.unlink()
+                logging.info(f"Deleted original compressed file: {file_path}")
+            except Exception as e:
+                logging.warning(f"Could not delete original file: {e}")
+
+            cached_path = csgo_folder / cached_name
+            file_size_mb = cached_path.stat().st_size / (1024 * 1024)
+
+            return {
+                "status": "success",
+                "message": f"Demo ready! ({file_size_mb:.1f} MB, already processed)",
+                "demo_name": cached_name,
+                "output_path": str(cached_path),
+                "csgo_folder": str(csgo_folder),
+                "clipboard": copy_playdemo_to_clipboard(cached_name),
+                "metadata": {"renamed": True}
+            }
+
         # Decompress directly to CS2 csgo folder
         output_filename = file_path.stem  # Removes .zst extension
         output_path = csgo_folder / output_filename
 
         logging.info(f"Decompressing to: {output_path}")
 
-        # Decompress the file
+        # Decompress the file.
+        # Demos are multi-MB blobs, so use large explicit buffers to keep the
+        # number of read/write syscalls low, and hint sequential access to the
+        # kernel where the platform supports it.
         with open(file_path, 'rb') as compressed:
             dctx = zstd.ZstdDecompressor()
-            with open(output_path, 'wb') as destination:
-                dctx.copy_stream(compressed, destination)
 
-        # Verify decompressed file exists
-        if not output_path.exists():
+            # Prefer memory-mapping the compressed input: the decompressor
+            # then reads straight from the page cache without an extra copy
+            # through a Python read buffer.
+            try:
+                source = mmap.mmap(compressed.fileno(), 0, access=mmap.ACCESS_READ)
+                if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    source.madvise(mmap.MADV_SEQUENTIAL)
+            except (ValueError, OSError):
+                # mmap can fail (e.g. empty file); fall back to buffered reads
+                source = compressed
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(compressed.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+            try:
+                with dctx.stream_reader(source, read_size=1 << 20) as reader, \
+                        open(output_path, 'wb') as destination:
+                    shutil.copyfileobj(reader, destination, length=8 * 1024 * 1024)
+            finally:
+                if source is not compressed:
+                    source.close()
+
+        # Verify decompressed file exists - a single stat covers both the
+        # existence check and the size report
+        try:
+            output_size = os.stat(output_path).st_size
+        except FileNotFoundError:
             logging.error("Decompression failed - output file not created")
             return {
                 "status": "error",
                 "message": "Decompression failed - output file not created"
             }
 
-        file_size_mb = output_path.stat().st_size / (1024 * 1024)
+        file_size_mb = output_size / (1024 * 1024)
         logging.info(f"Successfully decompressed: {output_path} ({file_size_mb:.1f} MB)")
 
         # Delete the original compressed file
@@ -312,14 +570,17 @@ def process_demo_file(file_path_str: str) -> dict:
         demo_metadata = parse_demo_metadata(output_path)
 
         if demo_metadata:
-            # Rename file with metadata
-            new_filename = demo_metadata['filename']
-            new_path = csgo_folder / new_filename
-
+            # Claim a collision-free name atomically and rename onto it
             try:
-                output_path.rename(new_path)
-                logging.info(f"Renamed: {output_filename} → {new_filename}")
-                output_path = new_path  # Update path reference
+                new_filename = _claim_demo_filename(
+                    csgo_folder, demo_metadata['base_filename'], output_path.name)
+
+                if new_filename != output_path.name:
+                    new_path = csgo_folder / new_filename
+                    os.replace(output_path, new_path)
+                    logging.info(f"Renamed: {output_filename} → {new_filename}")
+                    output_path = new_path  # Update path reference
+
                 final_filename = new_filename
             except Exception as e:
                 logging.warning(f"Failed to rename file: {e}")
@@ -327,6 +588,11 @@ def process_demo_file(file_path_str: str) -> dict:
         else:
             logging.info("Skipping demo rename (parsing failed or unavailable)")
 
+        # Record the fingerprint so a re-download of this demo is a cache hit
+        if digest:
+            demo_index[digest] = final_filename
+            _save_demo_index(csgo_folder, demo_index)
+
         # Copy playdemo command to clipboard
         clipboard_result = copy_playdemo_to_clipboard(final_filename)
 
@@ -359,55 +625,65 @@ def process_demo_file(file_path_str: str) -> dict:
             "message": f"Processing failed: {str(e)}"
         }
 
-def main():
+def handle_message(received_message):
     """
-    Main function to read a single message and send a single response.
+    Dispatch a single decoded message and send its response.
     """
-    try:
-        received_message = get_message()
-
-        # Check for the specific action requested by the Chrome extension
-        action = received_message.get("action")
-
-        if action == "processDemo":
-            file_path = received_message.get("filePath")
-            logging.info(f"Processing demo: {file_path}")
-            result = process_demo_file(file_path)
-            send_message(result)
-
-        elif action == "getCS2Path":
-            config_manager = PathConfigManager()
-            paths = config_manager.get_all_detected_paths()
-            send_message({"status": "success", "paths": paths})
-
-        elif action == "setCS2Path":
-            custom_path = received_message.get("path")
-            config_manager = PathConfigManager()
-            if config_manager.set_custom_path(custom_path):
-                send_message({"status": "success", "message": "Custom path set successfully"})
-            else:
-                send_message({"status": "error", "message": "Invalid path or path does not exist"})
-
-        elif action == "deleteDemo":
-            demo_filename = received_message.get("demoName")
-            result = delete_demo_file(demo_filename)
-            send_message(result)
-
-        elif action == "ping":
-            send_message({"status": "success", "message": "pong"})
-
+    # Check for the specific action requested by the Chrome extension
+    action = received_message.get("action")
+
+    if action == "processDemo":
+        file_path = received_message.get("filePath")
+        logging.info(f"Processing demo: {file_path}")
+        result = process_demo_file(file_path)
+        send_message(result)
+
+    elif action == "getCS2Path":
+        paths = _config_manager().get_all_detected_paths()
+        send_message({"status": "success", "paths": paths})
+
+    elif action == "setCS2Path":
+        custom_path = received_message.get("path")
+        if _config_manager().set_custom_path(custom_path):
+            _reset_path_cache()
+            send_message({"status": "success", "message": "Custom path set successfully"})
         else:
-            logging.warning(f"Unknown action: {action}")
-            send_message({"status": "unknown_action", "received": received_message})
+            send_message({"status": "error", "message": "Invalid path or path does not exist"})
 
-    except Exception as e:
-        # Log any exceptions to the file for debugging
-        logging.error(f"Error: {e}", exc_info=True)
-        # Attempt to send an error response back to the extension if possible
+    elif action == "deleteDemo":
+        demo_filename = received_message.get("demoName")
+        result = delete_demo_file(demo_filename)
+        send_message(result)
+
+    elif action == "ping":
+        send_message({"status": "success", "message": "pong"})
+
+    else:
+        logging.warning(f"Unknown action: {action}")
+        send_message({"status": "unknown_action", "received": received_message})
+
+def main():
+    """
+    Main loop: read and handle messages until the browser closes the port.
+
+    With a persistent port (connectNative) this amortizes interpreter
+    startup and dependency imports across every message on the
+    connection; one-shot sendNativeMessage clients still work, since
+    get_message exits cleanly on EOF.
+    """
+    while True:
         try:
-            send_message({"status": "error", "message": str(e)})
-        except Exception as send_e:
-            logging.error(f"Failed to send error response: {send_e}")
+            received_message = get_message()
+            handle_message(received_message)
+
+        except Exception as e:
+            # Log any exceptions to the file for debugging
+            logging.error(f"Error: {e}", exc_info=True)
+            # Attempt to send an error response back to the extension if possible
+            try:
+                send_message({"status": "error", "message": str(e)})
+            except Exception as send_e:
+                logging.error(f"Failed to send error response: {send_e}")
 
 if __name__ == '__main__':
     main()
@@ -10,29 +10,77 @@ from pathlib import Path
 from typing import Optional, List
 import logging
 
+try:
+    # Optional: C-implemented JSON parser, falls back to the stdlib module
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 class SteamPathFinder:
     """Find Steam and CS2 installation paths on Windows."""
 
     # Common CS2 folder names (Valve changed the name)
-    CS2_FOLDER_NAMES = [
+    CS2_FOLDER_NAMES = (
         "Counter-Strike Global Offensive",  # Current name
         "Counter-Strike 2",                  # Possible future name
         "csgo",                              # Legacy name
-    ]
+    )
+    # Frozen set for O(1) intersection with scandir results; the tuple
+    # above preserves preference order
+    _CS2_FOLDER_NAME_SET = frozenset(CS2_FOLDER_NAMES)
+
+    # Candidate locations relative to the CS2 install dir
+    CSGO_FOLDER_CANDIDATES = (("game", "csgo"), ("csgo",))
+    CS2_EXE_CANDIDATES = (("game", "bin", "win64", "cs2.exe"), ("cs2.exe",))
 
     def __init__(self):
-        self.steam_path: Optional[Path] = None
-        self.cs2_path: Optional[Path] = None
+        # steam_path/cs2_path are tri-state: None = not searched yet,
+        # False = searched and not found, Path = found. Caching the "not
+        # found" outcome keeps a missing install from being re-searched on
+        # every call; rescan() resets everything.
+        self.steam_path = None
+        self.cs2_path = None
         self.cs2_replays_path: Optional[Path] = None
+        self._libraries: Optional[List[Path]] = None
+        self._negative_cache: set = set()
+
+    def rescan(self):
+        """Forget all cached discovery results so the next call re-searches."""
+        self.steam_path = None
+        self.cs2_path = None
+        self.cs2_replays_path = None
+        self._libraries = None
+        self._negative_cache.clear()
+
+    def _probe(self, path: Path, checker=os.path.exists) -> bool:
+        """
+        Existence probe with a miss cache: candidate paths that were
+        already found missing are answered without touching the filesystem
+        again. `checker` is one of the os.path predicates (exists, isdir,
+        isfile), which are thin C shims without pathlib's per-call
+        overhead.
+        """
+        key = str(path)
+        if key in self._negative_cache:
+            return False
+        if checker(key):
+            return True
+        self._negative_cache.add(key)
+        return False
 
     def find_steam_installation(self) -> Optional[Path]:
         """
         Find Steam installation path from Windows registry.
+        The result is cached on the instance after the first lookup.
 
         Returns:
             Path to Steam installation or None if not found
         """
+        if self.steam_path is not None:
+            return self.steam_path or None
+
         registry_paths = [
             (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Valve\Steam"),
             (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Valve\Steam"),
@@ -45,8 +93,8 @@ class SteamPathFinder:
                 steam_path = winreg.QueryValueEx(key, "InstallPath")[0]
                 winreg.CloseKey(key)
 
-                steam_path = Path(steam_path)
-                if steam_path.exists():
+                if os.path.isdir(steam_path):
+                    steam_path = Path(steam_path)
                     logging.info(f"Found Steam installation at: {steam_path}")
                     self.steam_path = steam_path
                     return steam_path
@@ -54,6 +102,7 @@ class SteamPathFinder:
                 continue
 
         logging.warning("Steam installation not found in registry")
+        self.steam_path = False
         return None
 
     def get_steam_library_folders(self) -> List[Path]:
@@ -63,6 +112,10 @@ class SteamPathFinder:
         Returns:
             List of paths to Steam library folders
         """
+        # The VDF only needs parsing once per instance
+        if self._libraries is not None:
+            return self._libraries
+
         if not self.steam_path:
             self.find_steam_installation()
 
@@ -74,30 +127,40 @@ class SteamPathFinder:
         # Parse libraryfolders.vdf to find additional libraries
         vdf_path = self.steam_path / "steamapps" / "libraryfolders.vdf"
 
-        if not vdf_path.exists():
+        if not os.path.isfile(vdf_path):
             logging.warning(f"libraryfolders.vdf not found at {vdf_path}")
+            self._libraries = libraries
             return libraries
 
         try:
+            # Simple VDF parsing - the format is line-oriented, so scan one
+            # line at a time for "path" entries instead of reading the whole
+            # file into a single string
             with open(vdf_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+                for line in f:
+                    key_end = line.find('"path"')
+                    if key_end == -1:
+                        continue
+
+                    start = line.find('"', key_end + len('"path"'))
+                    end = line.find('"', start + 1)
+                    if start == -1 or end == -1:
+                        continue
 
-            # Simple VDF parsing - look for "path" entries
-            import re
-            paths = re.findall(r'"path"\s+"([^"]+)"', content)
+                    path_str = line[start + 1:end]
 
-            for path_str in paths:
-                # VDF uses escaped backslashes
-                path_str = path_str.replace('\\\\', '\\')
-                library_path = Path(path_str)
+                    # VDF uses escaped backslashes
+                    path_str = path_str.replace('\\\\', '\\')
+                    library_path = Path(path_str)
 
-                if library_path.exists() and library_path not in libraries:
-                    libraries.append(library_path)
-                    logging.info(f"Found Steam library: {library_path}")
+                    if os.path.isdir(path_str) and library_path not in libraries:
+                        libraries.append(library_path)
+                        logging.info(f"Found Steam library: {library_path}")
 
         except Exception as e:
             logging.error(f"Error parsing libraryfolders.vdf: {e}")
 
+        self._libraries = libraries
         return libraries
 
     def find_cs2_installation(self) -> Optional[Path]:
@@ -107,30 +170,48 @@ class SteamPathFinder:
         Returns:
             Path to CS2 installation or None if not found
         """
+        if self.cs2_path is not None:
+            return self.cs2_path or None
+
         libraries = self.get_steam_library_folders()
 
         for library in libraries:
             steamapps = library / "steamapps" / "common"
 
-            if not steamapps.exists():
+            # One directory read per library instead of a stat per candidate
+            try:
+                with os.scandir(steamapps) as entries:
+                    common_dirs = {entry.name for entry in entries if entry.is_dir()}
+            except OSError:
+                continue
+
+            # Try different possible CS2 folder names; one set intersection
+            # rules out libraries with no candidate at all
+            hits = self._CS2_FOLDER_NAME_SET & common_dirs
+            if not hits:
                 continue
 
-            # Try different possible CS2 folder names
             for folder_name in self.CS2_FOLDER_NAMES:
+                if folder_name not in hits:
+                    continue
+
                 cs2_path = steamapps / folder_name
 
-                # Check if this looks like a CS2 installation
-                if cs2_path.exists():
-                    # Verify it's actually CS2 by checking for key files/folders
-                    game_folder = cs2_path / "game"
-                    csgo_folder = game_folder / "csgo" if game_folder.exists() else cs2_path / "csgo"
+                # Verify it's actually CS2 by checking for key folders,
+                # again with a single directory read
+                try:
+                    with os.scandir(cs2_path) as entries:
+                        children = {entry.name for entry in entries if entry.is_dir()}
+                except OSError:
+                    continue
 
-                    if game_folder.exists() or csgo_folder.exists():
-                        logging.info(f"Found CS2 installation at: {cs2_path}")
-                        self.cs2_path = cs2_path
-                        return cs2_path
+                if "game" in children or "csgo" in children:
+                    logging.info(f"Found CS2 installation at: {cs2_path}")
+                    self.cs2_path = cs2_path
+                    return cs2_path
 
         logging.warning("CS2 installation not found in any Steam library")
+        self.cs2_path = False
         return None
 
     def find_cs2_csgo_folder(self) -> Optional[Path]:
@@ -146,17 +227,18 @@ class SteamPathFinder:
         if not self.cs2_path:
             return None
 
-        # Try different possible csgo folder structures
-        possible_paths = [
-            self.cs2_path / "game" / "csgo",
-            self.cs2_path / "csgo",
-        ]
+        # Try different possible csgo folder structures, lazily: candidates
+        # after the first hit are never built or probed
+        possible_paths = (
+            self.cs2_path.joinpath(*parts)
+            for parts in self.CSGO_FOLDER_CANDIDATES
+        )
 
-        for csgo_path in possible_paths:
-            if csgo_path.exists():
-                logging.info(f"Found CS2 csgo folder at: {csgo_path}")
-                self.cs2_replays_path = csgo_path
-                return csgo_path
+        csgo_path = next((p for p in possible_paths if self._probe(p, os.path.isdir)), None)
+        if csgo_path:
+            logging.info(f"Found CS2 csgo folder at: {csgo_path}")
+            self.cs2_replays_path = csgo_path
+            return csgo_path
 
         logging.warning("CS2 csgo folder not found")
         return None
@@ -184,16 +266,16 @@ class SteamPathFinder:
         if not self.cs2_path:
             return None
 
-        # Try different possible locations
-        possible_exes = [
-            self.cs2_path / "game" / "bin" / "win64" / "cs2.exe",
-            self.cs2_path / "cs2.exe",
-        ]
+        # Try different possible locations, lazily as above
+        possible_exes = (
+            self.cs2_path.joinpath(*parts)
+            for parts in self.CS2_EXE_CANDIDATES
+        )
 
-        for exe_path in possible_exes:
-            if exe_path.exists():
-                logging.info(f"Found CS2 executable at: {exe_path}")
-                return exe_path
+        exe_path = next((p for p in possible_exes if self._probe(p, os.path.isfile)), None)
+        if exe_path:
+            logging.info(f"Found CS2 executable at: {exe_path}")
+            return exe_path
 
         logging.warning("CS2 executable not found")
         return None
@@ -242,6 +324,9 @@ class PathConfigManager:
         """Load configuration from file."""
         if self.config_file.exists():
             try:
+                if ORJSON_AVAILABLE:
+                    # Parses straight from bytes, skipping the text decode
+                    return orjson.loads(self.config_file.read_bytes())
                 with open(self.config_file, 'r') as f:
                     return json.load(f)
             except Exception as e:
@@ -250,20 +335,42 @@ class PathConfigManager:
         return {}
 
     def save_config(self):
-        """Save configuration to file."""
+        """
+        Save configuration to file.
+
+        Writes compact JSON to a temp file and atomically replaces the
+        config, so a crash mid-write can never leave a corrupt config
+        (which would force a full path re-detection on the next run).
+        """
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, indent=2, fp=f)
+            tmp_file = self.config_file.with_suffix('.json.tmp')
+            if ORJSON_AVAILABLE:
+                tmp_file.write_bytes(orjson.dumps(self.config))
+            else:
+                with open(tmp_file, 'w') as f:
+                    json.dump(self.config, f, separators=(',', ':'))
+            os.replace(tmp_file, self.config_file)
             logging.info(f"Configuration saved to {self.config_file}")
         except Exception as e:
             logging.error(f"Error saving config: {e}")
 
+    @staticmethod
+    def _steam_install_mtime(steam_path) -> Optional[float]:
+        """Mtime of the Steam install dir, used to validate cached paths."""
+        if not steam_path:
+            return None
+        try:
+            return os.stat(str(steam_path)).st_mtime
+        except OSError:
+            return None
+
     def get_cs2_csgo_path(self) -> Optional[Path]:
         """
         Get CS2 csgo path. Try in order:
         1. User-configured custom path
-        2. Auto-detected path
-        3. None if not found
+        2. Cached auto-detected path from a previous run
+        3. Fresh auto-detection
+        4. None if not found
 
         Returns:
             Path to CS2 csgo folder or None
@@ -271,18 +378,33 @@ class PathConfigManager:
         # 1. Check user-configured path
         custom_path = self.config.get("cs2_csgo_path")
         if custom_path:
-            custom_path = Path(custom_path)
-            if custom_path.exists():
+            if os.path.isdir(custom_path):
                 logging.info(f"Using user-configured path: {custom_path}")
-                return custom_path
+                return Path(custom_path)
             else:
                 logging.warning(f"Configured path does not exist: {custom_path}")
 
-        # 2. Try auto-detection
+        # 2. Check cached auto-detected path. Valid as long as the csgo
+        # folder still exists and the Steam install dir hasn't changed -
+        # skips the registry queries, VDF parse and library probing entirely.
+        cached = self.config.get("cached_paths", {})
+        cached_csgo = cached.get("csgo_path")
+        if cached_csgo and os.path.isdir(cached_csgo):
+            if self._steam_install_mtime(cached.get("steam_path")) == cached.get("steam_install_mtime"):
+                logging.info(f"Using cached auto-detected path: {cached_csgo}")
+                return Path(cached_csgo)
+            logging.info("Steam installation changed, re-detecting paths")
+
+        # 3. Try auto-detection
         auto_path = self.finder.find_cs2_csgo_folder()
         if auto_path:
-            # Save the auto-detected path for faster access next time
-            self.config["cs2_csgo_path"] = str(auto_path)
+            # Cache the result (with the Steam mtime) for faster access next time
+            steam_path = self.finder.steam_path
+            self.config["cached_paths"] = {
+                "csgo_path": str(auto_path),
+                "steam_path": str(steam_path) if steam_path else None,
+                "steam_install_mtime": self._steam_install_mtime(steam_path),
+            }
             self.save_config()
             return auto_path
 
@@ -302,9 +424,7 @@ class PathConfigManager:
         Returns:
             True if path is valid and was set, False otherwise
         """
-        path = Path(path)
-
-        if not path.exists():
+        if not os.path.isdir(path):
             logging.error(f"Custom path does not exist: {path}")
             return False
 